@@ -1,51 +1,84 @@
 """
 AES Module for Quantum-Safe Digital Time Capsule
 
-Handles symmetric encryption/decryption using AES via Fernet.
+Handles symmetric encryption/decryption using AES-128-GCM.
 """
 
-from cryptography.fernet import Fernet
-import base64
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+import os
+import threading
+
+from utils import b64e, b64d
+
+
+NONCE_SIZE = 12  # 96-bit nonce recommended for GCM
+
+# Nonces are sliced from a pooled os.urandom() read to avoid a getrandom
+# syscall per capsule. The pool is dropped in forked children so that worker
+# processes never share random bytes.
+_RAND_POOL = bytearray()
+_RAND_LOCK = threading.Lock()
+_RAND_REFILL = 4096
+
+
+def _reset_rand_pool():
+    global _RAND_LOCK
+    _RAND_POOL.clear()
+    _RAND_LOCK = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_rand_pool)
+
+
+def _rand(n):
+    with _RAND_LOCK:
+        if len(_RAND_POOL) < n:
+            _RAND_POOL.extend(os.urandom(_RAND_REFILL))
+        out = bytes(_RAND_POOL[:n])
+        del _RAND_POOL[:n]
+    return out
 
 
 def generate_aes_key():
     """
-    Generate a new AES key for Fernet.
-    
+    Generate a new AES-128-GCM key.
+
     Returns:
         str: Base64 encoded AES key
     """
-    return base64.urlsafe_b64encode(Fernet.generate_key()).decode()
+    return b64e(AESGCM.generate_key(bit_length=128))
 
 
 def encrypt_message(message, aes_key_b64):
     """
-    Encrypt a message using AES.
-    
+    Encrypt a message using AES-GCM.
+
     Args:
         message (str): Plaintext message
         aes_key_b64 (str): Base64 encoded AES key
-        
+
     Returns:
-        str: Base64 encoded ciphertext
+        str: Base64 encoded nonce + ciphertext
     """
-    f = Fernet(aes_key_b64.encode())
-    ciphertext = f.encrypt(message.encode())
-    return base64.urlsafe_b64encode(ciphertext).decode()
+    aes = AESGCM(b64d(aes_key_b64))
+    nonce = _rand(NONCE_SIZE)
+    ciphertext = aes.encrypt(nonce, message.encode(), None)
+    return b64e(nonce + ciphertext)
 
 
 def decrypt_message(ciphertext_b64, aes_key_b64):
     """
-    Decrypt a message using AES.
-    
+    Decrypt a message using AES-GCM.
+
     Args:
-        ciphertext_b64 (str): Base64 encoded ciphertext
+        ciphertext_b64 (str): Base64 encoded nonce + ciphertext
         aes_key_b64 (str): Base64 encoded AES key
-        
+
     Returns:
         str: Decrypted plaintext
     """
-    f = Fernet(aes_key_b64.encode())
-    ciphertext = base64.urlsafe_b64decode(ciphertext_b64)
-    plaintext = f.decrypt(ciphertext)
+    aes = AESGCM(b64d(aes_key_b64))
+    data = b64d(ciphertext_b64)
+    plaintext = aes.decrypt(data[:NONCE_SIZE], data[NONCE_SIZE:], None)
     return plaintext.decode()
\ No newline at end of file
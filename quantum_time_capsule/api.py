@@ -4,22 +4,76 @@ Flask API for Quantum-Safe Digital Time Capsule
 Exposes the time capsule functionality via REST API for the React frontend.
 """
 
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+from flask_compress import Compress
+
+try:
+    import orjson
+except ImportError:  # Keep Flask's default JSON provider
+    orjson = None
 
-from pqc_module import generate_keys, encapsulate_key, decapsulate_key, sign_data, verify_signature
+from pqc_module import generate_keys, encapsulate_key, decapsulate_key, sign_data, verify_signature, metadata_digest
 from aes_module import encrypt_message, decrypt_message
-from storage_module import save_keys, load_keys, save_capsule, load_capsule, list_capsules
-from utils import is_unlocked, get_current_timestamp, validate_date
+from storage_module import save_keys, load_keys, save_capsule, load_capsule, list_capsules, load_capsule_index, KEYS_FILE
+from utils import is_unlocked, is_capsule_unlocked, get_current_timestamp, validate_date, date_to_epoch
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider that encodes and decodes with orjson."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 CORS(app)  # Enable CORS for React frontend
+Compress(app)  # Gzip large JSON responses
+
+# Shared worker pool for per-capsule crypto; the cryptography bindings release
+# the GIL. Threads start lazily, so this is safe to import before a fork.
+_POOL = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+# Keys loaded once per process as (key file mtime, keys). The tuple is swapped
+# in a single assignment so concurrent requests never see a partial update, and
+# the mtime check picks up keys regenerated by another worker process.
+_KEYS = (None, None)
+
+
+def _current_keys():
+    """Return the cached keys, reloading only if the key file changed."""
+    global _KEYS
+    try:
+        mtime = os.stat(KEYS_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached_mtime, keys = _KEYS
+    if keys is None or mtime != cached_mtime:
+        keys = load_keys()
+        _KEYS = (mtime, keys)
+    return keys
+
+
+_current_keys()  # Preload at startup (shared with workers under gunicorn --preload)
 
 @app.route('/generate_keys', methods=['POST'])
 def api_generate_keys():
+    global _KEYS
     try:
         keys = generate_keys()
         save_keys(keys)
+        # Another request may have saved keys concurrently; reload whatever
+        # actually ended up on disk rather than caching this request's keys
+        _KEYS = (None, None)
         return jsonify({"success": True, "message": "PQC Keys generated and saved!"})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -36,7 +90,7 @@ def api_create_capsule():
     if not validate_date(unlock_date):
         return jsonify({"success": False, "error": "Invalid date format. Use YYYY-MM-DD."}), 400
 
-    keys = load_keys()
+    keys = _current_keys()
     if not keys:
         return jsonify({"success": False, "error": "No keys found. Please generate keys first."}), 400
 
@@ -44,16 +98,15 @@ def api_create_capsule():
         kem_ct, aes_key = encapsulate_key(keys['kem_public'])
         ciphertext = encrypt_message(message, aes_key)
         timestamp = get_current_timestamp()
-        metadata = f"{timestamp}|{unlock_date}|{ciphertext}|{kem_ct}"
-        signature = sign_data(metadata, keys['sig_secret'])
 
         capsule = {
             "timestamp": timestamp,
             "unlock_date": unlock_date,
             "ciphertext": ciphertext,
             "kem_ct": kem_ct,
-            "signature": signature
+            "unlock_epoch": date_to_epoch(unlock_date)
         }
+        capsule["signature"] = sign_data(metadata_digest(capsule), keys['sig_secret'])
 
         save_capsule(capsule)
         return jsonify({
@@ -67,17 +120,15 @@ def api_create_capsule():
 @app.route('/capsules', methods=['GET'])
 def api_list_capsules():
     try:
-        capsules = list_capsules()
-        capsule_list = []
-        for ts in capsules:
-            capsule = load_capsule(ts)
-            if capsule:
-                status = "unlocked" if is_unlocked(capsule['unlock_date']) else "locked"
-                capsule_list.append({
-                    "timestamp": ts,
-                    "unlock_date": capsule['unlock_date'],
-                    "status": status
-                })
+        index = load_capsule_index()
+        capsule_list = [
+            {
+                "timestamp": ts,
+                "unlock_date": entry['unlock_date'],
+                "status": "unlocked" if is_capsule_unlocked(entry) else "locked"
+            }
+            for ts, entry in sorted(index.items())
+        ]
         return jsonify({"success": True, "capsules": capsule_list})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -96,7 +147,7 @@ def api_decrypt_capsule():
 
     timestamp = capsules[capsule_index]
     capsule = load_capsule(timestamp)
-    keys = load_keys()
+    keys = _current_keys()
 
     if not capsule or not keys:
         return jsonify({"success": False, "error": "Capsule or keys not found."}), 400
@@ -104,8 +155,7 @@ def api_decrypt_capsule():
     if not is_unlocked(capsule['unlock_date']):
         return jsonify({"success": False, "error": f"Capsule locked until {capsule['unlock_date']}"}), 400
 
-    metadata = f"{capsule['timestamp']}|{capsule['unlock_date']}|{capsule['ciphertext']}|{capsule['kem_ct']}"
-    if not verify_signature(metadata, capsule['signature'], keys['sig_public']):
+    if not verify_signature(metadata_digest(capsule), capsule['signature'], keys['sig_public']):
         return jsonify({"success": False, "error": "Signature verification failed! Capsule may be tampered."}), 400
 
     try:
@@ -138,13 +188,12 @@ def api_verify_capsule():
 
     timestamp = capsules[capsule_index]
     capsule = load_capsule(timestamp)
-    keys = load_keys()
+    keys = _current_keys()
 
     if not capsule or not keys:
         return jsonify({"success": False, "error": "Capsule or keys not found."}), 400
 
-    metadata = f"{capsule['timestamp']}|{capsule['unlock_date']}|{capsule['ciphertext']}|{capsule['kem_ct']}"
-    verified = verify_signature(metadata, capsule['signature'], keys['sig_public'])
+    verified = verify_signature(metadata_digest(capsule), capsule['signature'], keys['sig_public'])
 
     return jsonify({
         "success": True,
@@ -154,5 +203,40 @@ def api_verify_capsule():
         "unlock_date": capsule['unlock_date']
     })
 
+@app.route('/verify_batch', methods=['POST'])
+def api_verify_batch():
+    data = request.get_json()
+    indices = data.get('indices')
+
+    # bool is a subclass of int, so JSON true/false must be rejected explicitly
+    if not isinstance(indices, list) or not all(type(i) is int for i in indices):
+        return jsonify({"success": False, "error": "Invalid capsule indices."}), 400
+
+    capsules = list_capsules()
+    if len(indices) > len(capsules):
+        return jsonify({"success": False, "error": "Too many capsule indices."}), 400
+    if any(i < 0 or i >= len(capsules) for i in indices):
+        return jsonify({"success": False, "error": "Capsule index out of range."}), 400
+
+    # Each capsule is verified at most once per request
+    indices = list(dict.fromkeys(indices))
+
+    keys = _current_keys()
+    if not keys:
+        return jsonify({"success": False, "error": "No keys found. Please generate keys first."}), 400
+
+    # The public key is parsed once and shared by every worker thread; each
+    # thread loads only the capsule it verifies
+    def verify_one(i):
+        capsule = load_capsule(capsules[i])
+        if capsule is None:
+            return False
+        return verify_signature(metadata_digest(capsule), capsule['signature'], keys['sig_public'])
+
+    results = {str(i): verified for i, verified in zip(indices, _POOL.map(verify_one, indices))}
+
+    return jsonify({"success": True, "results": results})
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Development server only; use wsgi.py with gunicorn in production
+    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -7,10 +7,10 @@ Command-line interface for managing PQC keys and time capsules.
 import sys
 from datetime import datetime
 
-from pqc_module import generate_keys, encapsulate_key, decapsulate_key, sign_data, verify_signature
+from pqc_module import generate_keys, encapsulate_key, decapsulate_key, sign_data, verify_signature, metadata_digest
 from aes_module import generate_aes_key, encrypt_message, decrypt_message
-from storage_module import save_keys, load_keys, save_capsule, load_capsule, list_capsules
-from utils import is_unlocked, get_current_timestamp, validate_date
+from storage_module import save_keys, load_keys, save_capsule, load_capsule, list_capsules, load_capsule_index
+from utils import is_unlocked, is_capsule_unlocked, get_current_timestamp, validate_date, date_to_epoch
 
 
 def print_menu():
@@ -67,22 +67,19 @@ def create_capsule_option():
         # Encrypt message
         ciphertext = encrypt_message(message, aes_key)
         
-        # Prepare metadata for signing
-        timestamp = get_current_timestamp()
-        metadata = f"{timestamp}|{unlock_date}|{ciphertext}|{kem_ct}"
-        
-        # Sign metadata
-        signature = sign_data(metadata, keys['sig_secret'])
-        
         # Create capsule
+        timestamp = get_current_timestamp()
         capsule = {
             "timestamp": timestamp,
             "unlock_date": unlock_date,
             "ciphertext": ciphertext,
             "kem_ct": kem_ct,
-            "signature": signature
+            "unlock_epoch": date_to_epoch(unlock_date)
         }
         
+        # Sign metadata digest
+        capsule["signature"] = sign_data(metadata_digest(capsule), keys['sig_secret'])
+        
         save_capsule(capsule)
         print(f"🔒 Capsule created successfully (unlock date: {unlock_date})")
         
@@ -92,17 +89,15 @@ def create_capsule_option():
 
 def view_capsules_option():
     """List all capsules."""
-    capsules = list_capsules()
-    if not capsules:
+    index = load_capsule_index()
+    if not index:
         print("📭 No capsules found.")
         return
     
     print("📦 Available Capsules:")
-    for i, ts in enumerate(capsules, 1):
-        capsule = load_capsule(ts)
-        if capsule:
-            status = "🔓 Unlocked" if is_unlocked(capsule['unlock_date']) else "🔒 Locked"
-            print(f"{i}. {ts} - Unlock: {capsule['unlock_date']} ({status})")
+    for i, (ts, entry) in enumerate(index.items(), 1):
+        status = "🔓 Unlocked" if is_capsule_unlocked(entry) else "🔒 Locked"
+        print(f"{i}. {ts} - Unlock: {entry['unlock_date']} ({status})")
 
 
 def decrypt_capsule_option():
@@ -137,8 +132,7 @@ def decrypt_capsule_option():
         return
     
     # Verify signature
-    metadata = f"{capsule['timestamp']}|{capsule['unlock_date']}|{capsule['ciphertext']}|{capsule['kem_ct']}"
-    if not verify_signature(metadata, capsule['signature'], keys['sig_public']):
+    if not verify_signature(metadata_digest(capsule), capsule['signature'], keys['sig_public']):
         print("❌ Signature verification failed! Capsule may be tampered.")
         return
     
@@ -183,8 +177,7 @@ def verify_capsule_option():
         print("❌ Capsule or keys not found.")
         return
     
-    metadata = f"{capsule['timestamp']}|{capsule['unlock_date']}|{capsule['ciphertext']}|{capsule['kem_ct']}"
-    if verify_signature(metadata, capsule['signature'], keys['sig_public']):
+    if verify_signature(metadata_digest(capsule), capsule['signature'], keys['sig_public']):
         print("✅ Signature verified - capsule is authentic")
     else:
         print("❌ Signature verification failed - capsule may be tampered")
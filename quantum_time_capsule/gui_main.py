@@ -7,10 +7,10 @@ Tkinter-based graphical interface for the time capsule application.
 import tkinter as tk
 from tkinter import simpledialog, messagebox
 
-from pqc_module import generate_keys, encapsulate_key, decapsulate_key, sign_data, verify_signature
+from pqc_module import generate_keys, encapsulate_key, decapsulate_key, sign_data, verify_signature, metadata_digest
 from aes_module import encrypt_message, decrypt_message
-from storage_module import save_keys, load_keys, save_capsule, load_capsule, list_capsules
-from utils import is_unlocked, get_current_timestamp, validate_date
+from storage_module import save_keys, load_keys, save_capsule, load_capsule, list_capsules, load_capsule_index
+from utils import is_unlocked, is_capsule_unlocked, get_current_timestamp, validate_date, date_to_epoch
 
 
 class TimeCapsuleGUI:
@@ -90,16 +90,15 @@ class TimeCapsuleGUI:
             kem_ct, aes_key = encapsulate_key(keys['kem_public'])
             ciphertext = encrypt_message(message, aes_key)
             timestamp = get_current_timestamp()
-            metadata = f"{timestamp}|{unlock_date}|{ciphertext}|{kem_ct}"
-            signature = sign_data(metadata, keys['sig_secret'])
 
             capsule = {
                 "timestamp": timestamp,
                 "unlock_date": unlock_date,
                 "ciphertext": ciphertext,
                 "kem_ct": kem_ct,
-                "signature": signature
+                "unlock_epoch": date_to_epoch(unlock_date)
             }
+            capsule["signature"] = sign_data(metadata_digest(capsule), keys['sig_secret'])
 
             save_capsule(capsule)
             self.output_text.insert(tk.END, f"🔒 Capsule created successfully (unlock date: {unlock_date})\n\n")
@@ -108,17 +107,15 @@ class TimeCapsuleGUI:
             self.output_text.insert(tk.END, f"❌ Error creating capsule: {e}\n\n")
 
     def view_capsules(self):
-        capsules = list_capsules()
-        if not capsules:
+        index = load_capsule_index()
+        if not index:
             self.output_text.insert(tk.END, "📭 No capsules found.\n\n")
             return
 
         self.output_text.insert(tk.END, "📦 Available Capsules:\n")
-        for i, ts in enumerate(capsules, 1):
-            capsule = load_capsule(ts)
-            if capsule:
-                status = "🔓 Unlocked" if is_unlocked(capsule['unlock_date']) else "🔒 Locked"
-                self.output_text.insert(tk.END, f"{i}. {ts} - Unlock: {capsule['unlock_date']} ({status})\n")
+        for i, (ts, entry) in enumerate(index.items(), 1):
+            status = "🔓 Unlocked" if is_capsule_unlocked(entry) else "🔒 Locked"
+            self.output_text.insert(tk.END, f"{i}. {ts} - Unlock: {entry['unlock_date']} ({status})\n")
         self.output_text.insert(tk.END, "\n")
 
     def decrypt_capsule(self):
@@ -147,8 +144,7 @@ class TimeCapsuleGUI:
             self.output_text.insert(tk.END, f"⏳ Capsule locked until {capsule['unlock_date']}\n\n")
             return
 
-        metadata = f"{capsule['timestamp']}|{capsule['unlock_date']}|{capsule['ciphertext']}|{capsule['kem_ct']}"
-        if not verify_signature(metadata, capsule['signature'], keys['sig_public']):
+        if not verify_signature(metadata_digest(capsule), capsule['signature'], keys['sig_public']):
             self.output_text.insert(tk.END, "❌ Signature verification failed! Capsule may be tampered.\n\n")
             return
 
@@ -183,8 +179,7 @@ class TimeCapsuleGUI:
             self.output_text.insert(tk.END, "❌ Capsule or keys not found.\n\n")
             return
 
-        metadata = f"{capsule['timestamp']}|{capsule['unlock_date']}|{capsule['ciphertext']}|{capsule['kem_ct']}"
-        if verify_signature(metadata, capsule['signature'], keys['sig_public']):
+        if verify_signature(metadata_digest(capsule), capsule['signature'], keys['sig_public']):
             self.output_text.insert(tk.END, "✅ Signature verified - capsule is authentic\n\n")
         else:
             self.output_text.insert(tk.END, "❌ Signature verification failed - capsule may be tampered\n\n")
@@ -1,173 +1,209 @@
 """
 PQC Module for Quantum-Safe Digital Time Capsule
 
-Note: This implementation uses classical cryptography (RSA + ECDSA) for demonstration
+Note: This implementation uses classical cryptography (X25519 + Ed25519) for demonstration
 since liboqs installation failed in this environment. For real PQC, use liboqs-python
 with Kyber512 and Dilithium2.
 """
 
-import base64
+import functools
 from cryptography.hazmat.primitives import serialization, hashes
-from cryptography.hazmat.primitives.asymmetric import rsa, ec, padding
-from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import ed25519, x25519
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from utils import b64e, b64d
+from qtc_hot import fields_digest
+
+
+KEM_INFO = b"qtc-kem"
+
+# Capsule fields covered by the signature, in canonical order
+METADATA_FIELDS = ("timestamp", "unlock_date", "ciphertext", "kem_ct")
+
+
+# Key objects are immutable handles, so each stored key only needs to be parsed once
+@functools.lru_cache(maxsize=32)
+def _load_ed25519_public(key_b64):
+    return ed25519.Ed25519PublicKey.from_public_bytes(b64d(key_b64))
+
+
+@functools.lru_cache(maxsize=32)
+def _load_ed25519_private(key_b64):
+    return ed25519.Ed25519PrivateKey.from_private_bytes(b64d(key_b64))
+
+
+@functools.lru_cache(maxsize=32)
+def _load_x25519_public(key_b64):
+    return x25519.X25519PublicKey.from_public_bytes(b64d(key_b64))
+
+
+@functools.lru_cache(maxsize=32)
+def _load_x25519_private(key_b64):
+    return x25519.X25519PrivateKey.from_private_bytes(b64d(key_b64))
 
 
 def generate_keys():
     """
-    Generate RSA key pair (simulating Kyber512) and ECDSA key pair (simulating Dilithium2).
+    Generate X25519 key pair (simulating Kyber512) and Ed25519 key pair (simulating Dilithium2).
     
     Returns:
         dict: Contains kem_public, kem_secret, sig_public, sig_secret as base64 strings
     """
-    # Generate RSA keys for KEM simulation
-    kem_private = rsa.generate_private_key(
-        public_exponent=65537,
-        key_size=2048,
-        backend=default_backend()
-    )
+    # Generate X25519 keys for KEM simulation
+    kem_private = x25519.X25519PrivateKey.generate()
     kem_public = kem_private.public_key()
     
-    # Generate ECDSA keys for signature simulation
-    sig_private = ec.generate_private_key(ec.SECP256R1(), default_backend())
+    # Generate Ed25519 keys for signature simulation
+    sig_private = ed25519.Ed25519PrivateKey.generate()
     sig_public = sig_private.public_key()
     
-    # Serialize to PEM then base64
-    kem_private_pem = kem_private.private_bytes(
-        encoding=serialization.Encoding.PEM,
-        format=serialization.PrivateFormat.PKCS8,
+    # Serialize all keys as raw 32-byte values
+    kem_private_raw = kem_private.private_bytes(
+        encoding=serialization.Encoding.Raw,
+        format=serialization.PrivateFormat.Raw,
         encryption_algorithm=serialization.NoEncryption()
     )
-    kem_public_pem = kem_public.public_bytes(
-        encoding=serialization.Encoding.PEM,
-        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    kem_public_raw = kem_public.public_bytes(
+        encoding=serialization.Encoding.Raw,
+        format=serialization.PublicFormat.Raw
     )
-    sig_private_pem = sig_private.private_bytes(
-        encoding=serialization.Encoding.PEM,
-        format=serialization.PrivateFormat.PKCS8,
+    sig_private_raw = sig_private.private_bytes(
+        encoding=serialization.Encoding.Raw,
+        format=serialization.PrivateFormat.Raw,
         encryption_algorithm=serialization.NoEncryption()
     )
-    sig_public_pem = sig_public.public_bytes(
-        encoding=serialization.Encoding.PEM,
-        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    sig_public_raw = sig_public.public_bytes(
+        encoding=serialization.Encoding.Raw,
+        format=serialization.PublicFormat.Raw
     )
     
     return {
-        'kem_public': base64.b64encode(kem_public_pem).decode(),
-        'kem_secret': base64.b64encode(kem_private_pem).decode(),
-        'sig_public': base64.b64encode(sig_public_pem).decode(),
-        'sig_secret': base64.b64encode(sig_private_pem).decode()
+        'kem_public': b64e(kem_public_raw),
+        'kem_secret': b64e(kem_private_raw),
+        'sig_public': b64e(sig_public_raw),
+        'sig_secret': b64e(sig_private_raw)
     }
 
 
-def encapsulate_key(kem_public_b64):
+def _derive_aes_key(shared_secret):
     """
-    Simulate KEM: Generate random AES key and "encapsulate" with RSA encryption.
+    Derive the AES-128 key from an X25519 shared secret using HKDF-SHA256.
     
     Args:
-        kem_public_b64 (str): Base64 encoded RSA public key
+        shared_secret (bytes): Raw X25519 shared secret
         
     Returns:
-        tuple: (ciphertext_b64, shared_secret_b64) - ciphertext is encrypted AES key, shared_secret is AES key
+        bytes: 16-byte AES key
+    """
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=16,
+        salt=None,
+        info=KEM_INFO
+    ).derive(shared_secret)
+
+
+def encapsulate_key(kem_public_b64):
     """
-    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-    import os
+    Simulate KEM: ephemeral X25519 key agreement with the recipient public key.
     
+    Args:
+        kem_public_b64 (str): Base64 encoded X25519 public key
+        
+    Returns:
+        tuple: (ciphertext_b64, shared_secret_b64) - ciphertext is the ephemeral public key, shared_secret is AES key
+    """
     # Load public key
-    kem_public_pem = base64.b64decode(kem_public_b64)
-    kem_public = serialization.load_pem_public_key(kem_public_pem, backend=default_backend())
-    
-    # Generate random AES key (32 bytes)
-    shared_secret = os.urandom(32)
-    
-    # Encrypt the AES key with RSA
-    ciphertext = kem_public.encrypt(
-        shared_secret,
-        padding.OAEP(
-            mgf=padding.MGF1(algorithm=hashes.SHA256()),
-            algorithm=hashes.SHA256(),
-            label=None
-        )
+    kem_public = _load_x25519_public(kem_public_b64)
+    
+    # Ephemeral key agreement
+    ephemeral = x25519.X25519PrivateKey.generate()
+    aes_key = _derive_aes_key(ephemeral.exchange(kem_public))
+    
+    ciphertext = ephemeral.public_key().public_bytes(
+        encoding=serialization.Encoding.Raw,
+        format=serialization.PublicFormat.Raw
     )
     
     return (
-        base64.b64encode(ciphertext).decode(),
-        base64.b64encode(shared_secret).decode()
+        b64e(ciphertext),
+        b64e(aes_key)
     )
 
 
 def decapsulate_key(kem_secret_b64, ciphertext_b64):
     """
-    Simulate KEM decapsulation: Decrypt the AES key with RSA.
+    Simulate KEM decapsulation: X25519 key agreement with the ephemeral public key.
     
     Args:
-        kem_secret_b64 (str): Base64 encoded RSA private key
-        ciphertext_b64 (str): Base64 encoded encrypted AES key
+        kem_secret_b64 (str): Base64 encoded X25519 private key
+        ciphertext_b64 (str): Base64 encoded ephemeral public key
         
     Returns:
         str: Base64 encoded AES key
     """
     # Load private key
-    kem_secret_pem = base64.b64decode(kem_secret_b64)
-    kem_secret = serialization.load_pem_private_key(kem_secret_pem, password=None, backend=default_backend())
-    
-    # Decrypt
-    ciphertext = base64.b64decode(ciphertext_b64)
-    shared_secret = kem_secret.decrypt(
-        ciphertext,
-        padding.OAEP(
-            mgf=padding.MGF1(algorithm=hashes.SHA256()),
-            algorithm=hashes.SHA256(),
-            label=None
-        )
-    )
+    kem_secret = _load_x25519_private(kem_secret_b64)
     
-    return base64.b64encode(shared_secret).decode()
+    # Reconstruct ephemeral public key and derive
+    ephemeral_public = x25519.X25519PublicKey.from_public_bytes(b64d(ciphertext_b64))
+    aes_key = _derive_aes_key(kem_secret.exchange(ephemeral_public))
+    
+    return b64e(aes_key)
 
 
-def sign_data(data, sig_secret_b64):
+def metadata_digest(capsule):
     """
-    Sign data using ECDSA (simulating Dilithium2).
+    Compute the SHA-256 digest of the capsule metadata that gets signed.
     
     Args:
-        data (str): Data to sign
-        sig_secret_b64 (str): Base64 encoded ECDSA private key
+        capsule (dict): Capsule with timestamp, unlock_date, ciphertext and kem_ct
+        
+    Returns:
+        bytes: 32-byte SHA-256 digest
+    """
+    return fields_digest(*(capsule[field] for field in METADATA_FIELDS))
+
+
+def sign_data(digest, sig_secret_b64):
+    """
+    Sign a SHA-256 digest using Ed25519 (simulating Dilithium2).
+    
+    Args:
+        digest (bytes): SHA-256 digest from metadata_digest()
+        sig_secret_b64 (str): Base64 encoded Ed25519 private key
         
     Returns:
         str: Base64 encoded signature
     """
     # Load private key
-    sig_secret_pem = base64.b64decode(sig_secret_b64)
-    sig_secret = serialization.load_pem_private_key(sig_secret_pem, password=None, backend=default_backend())
+    sig_secret = _load_ed25519_private(sig_secret_b64)
     
-    # Sign
-    signature = sig_secret.sign(
-        data.encode(),
-        ec.ECDSA(hashes.SHA256())
-    )
+    # Sign (Ed25519 signs the message itself, no hash parameter)
+    signature = sig_secret.sign(digest)
     
-    return base64.b64encode(signature).decode()
+    return b64e(signature)
 
 
-def verify_signature(data, signature_b64, sig_public_b64):
+def verify_signature(digest, signature_b64, sig_public_b64):
     """
-    Verify signature using ECDSA.
+    Verify signature over a SHA-256 digest using Ed25519.
     
     Args:
-        data (str): Original data
+        digest (bytes): SHA-256 digest from metadata_digest()
         signature_b64 (str): Base64 encoded signature
-        sig_public_b64 (str): Base64 encoded ECDSA public key
+        sig_public_b64 (str): Base64 encoded Ed25519 public key
         
     Returns:
         bool: True if signature is valid
     """
     # Load public key
-    sig_public_pem = base64.b64decode(sig_public_b64)
-    sig_public = serialization.load_pem_public_key(sig_public_pem, backend=default_backend())
+    sig_public = _load_ed25519_public(sig_public_b64)
     
-    signature = base64.b64decode(signature_b64)
+    signature = b64d(signature_b64)
     
     try:
-        sig_public.verify(signature, data.encode(), ec.ECDSA(hashes.SHA256()))
+        sig_public.verify(signature, digest)
         return True
     except:
         return False
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""
+Hot-path helpers for Quantum-Safe Digital Time Capsule
+
+Small, fully annotated functions that run on every API call. This module is
+plain Python and works as-is; setup.py can compile it with mypyc, in which
+case the extension module is imported in its place.
+"""
+
+import binascii
+import hashlib
+
+
+def b64e(data: bytes) -> str:
+    """
+    Encode bytes as a single-line standard Base64 string.
+
+    Args:
+        data (bytes): Raw bytes
+
+    Returns:
+        str: Base64 encoded string
+    """
+    return binascii.b2a_base64(data, newline=False).decode('ascii')
+
+
+def b64d(data_b64: str) -> bytes:
+    """
+    Decode a standard Base64 string.
+
+    Args:
+        data_b64 (str): Base64 encoded string
+
+    Returns:
+        bytes: Decoded bytes
+    """
+    return binascii.a2b_base64(data_b64)
+
+
+def fields_digest(timestamp: str, unlock_date: str, ciphertext: str, kem_ct: str) -> bytes:
+    """
+    Compute the SHA-256 digest of "timestamp|unlock_date|ciphertext|kem_ct".
+
+    Fields are fed into the hash one at a time instead of being joined first.
+
+    Args:
+        timestamp (str): Capsule timestamp
+        unlock_date (str): Unlock date in YYYY-MM-DD format
+        ciphertext (str): Base64 encoded AES-GCM ciphertext
+        kem_ct (str): Base64 encoded KEM ciphertext
+
+    Returns:
+        bytes: 32-byte SHA-256 digest
+    """
+    h = hashlib.sha256(timestamp.encode())
+    for field in (unlock_date, ciphertext, kem_ct):
+        h.update(b"|")
+        h.update(field.encode())
+    return h.digest()
@@ -0,0 +1,22 @@
+"""
+Optional build step: compile qtc_hot.py to a C extension with mypyc.
+
+    pip install mypy
+    python setup.py build_ext --inplace
+
+Without mypyc the pure-Python qtc_hot.py is used unchanged.
+"""
+
+from setuptools import setup
+
+try:
+    from mypyc.build import mypycify
+    ext_modules = mypycify(['qtc_hot.py'])
+except ImportError:
+    ext_modules = []
+
+setup(
+    name='quantum_time_capsule',
+    py_modules=['qtc_hot'],
+    ext_modules=ext_modules,
+)
@@ -1,30 +1,113 @@
 """
 Storage Module for Quantum-Safe Digital Time Capsule
 
-Handles saving and loading keys and capsules using JSON files.
+Handles saving and loading keys (JSON file) and capsules (SQLite database).
 """
 
 import json
 import os
+import sqlite3
+import tempfile
+import threading
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder
+    orjson = None
+
+
+from utils import b64e, b64d
+
 
 KEYS_FILE = "data/keys/user_keys.json"
-CAPSULES_DIR = "data/capsules/"
+_KEYS_DIR = os.path.dirname(KEYS_FILE)
+CAPSULES_DB = "data/capsules.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS capsules (
+    ts TEXT PRIMARY KEY,
+    unlock_date TEXT NOT NULL,
+    unlock_epoch INTEGER,
+    ciphertext BLOB NOT NULL,
+    kem_ct BLOB NOT NULL,
+    signature BLOB NOT NULL
+)
+"""
+_COLUMNS = "ts, unlock_date, unlock_epoch, ciphertext, kem_ct, signature"
+
+# One connection per process, shared by its threads under _DB_LOCK
+_DB = None
+_DB_PID = None
+_DB_LOCK = threading.Lock()
+_DB_OPEN_LOCK = threading.Lock()
+
+# Listing results keyed by query, valid while PRAGMA data_version is unchanged.
+# data_version only moves on commits from other connections, so this
+# process's own writes clear the cache explicitly.
+_LISTING_CACHE = {}
+
+
+def _dumps(obj):
+    """Serialize to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _loads(data):
+    """Parse JSON bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
-def save_keys(keys):
+def _datasync(fd):
+    """Flush file data (not metadata) to disk, where the platform allows it."""
+    if hasattr(os, "fdatasync"):
+        os.fdatasync(fd)
+    else:
+        os.fsync(fd)
+
+
+def save_keys(keys, durable=True):
     """
     Save PQC keys to file.
     
     Args:
         keys (dict): Keys dictionary from generate_keys()
+        durable (bool): Flush the file to disk before returning
     """
-    os.makedirs(os.path.dirname(KEYS_FILE), exist_ok=True)
-    with open(KEYS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(keys, f, indent=2, ensure_ascii=False)
-        f.flush()  # Ensure data is written to disk
-        os.fsync(f.fileno())  # Force write to disk
+    # Write a temp file and rename it over the old one, so a crash leaves
+    # either the previous keys or the new ones, never a truncated file. Each
+    # writer gets its own temp file, so concurrent saves cannot clobber or
+    # rename away each other's data; the last rename wins.
+    try:
+        fd, tmp = tempfile.mkstemp(dir=_KEYS_DIR, prefix='user_keys.', suffix='.tmp')
+    except FileNotFoundError:  # Only create the directory when it is missing
+        os.makedirs(_KEYS_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=_KEYS_DIR, prefix='user_keys.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_dumps(keys))
+            if durable:
+                f.flush()
+                _datasync(f.fileno())
+        os.replace(tmp, KEYS_FILE)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    
+    if durable and hasattr(os, "O_DIRECTORY"):
+        # Persist the rename itself
+        dfd = os.open(_KEYS_DIR, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dfd)
+        finally:
+            os.close(dfd)
 
 
 def load_keys():
@@ -34,37 +117,153 @@ def load_keys():
     Returns:
         dict: Keys dictionary or None if file doesn't exist
     """
-    if not os.path.exists(KEYS_FILE):
-        return None
     try:
-        with open(KEYS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(KEYS_FILE, 'rb') as f:
+            return _loads(f.read())
+    except FileNotFoundError:
+        return None
     except (json.JSONDecodeError, IOError) as e:
         print(f"Error loading keys: {e}")
         return None
 
 
-def save_capsule(capsule_data):
+def _db():
+    """
+    Return this process's capsule database connection, opening it on first use.
+    
+    The connection is reopened after a fork so worker processes never share
+    the parent's SQLite handle.
     """
-    Save capsule data to file.
+    global _DB, _DB_PID
+    if _DB is not None and _DB_PID == os.getpid():
+        return _DB
+    
+    with _DB_OPEN_LOCK:
+        if _DB is not None and _DB_PID == os.getpid():
+            return _DB
+        
+        os.makedirs(os.path.dirname(CAPSULES_DB), exist_ok=True)
+        conn = sqlite3.connect(CAPSULES_DB, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            conn.execute(_SCHEMA)
+        _DB, _DB_PID = conn, os.getpid()
+        _LISTING_CACHE.clear()
+    return _DB
+
+
+def _capsule_row(capsule):
+    """Convert a capsule dict to a database row, decoding Base64 fields to bytes."""
+    return (
+        capsule['timestamp'],
+        capsule['unlock_date'],
+        capsule.get('unlock_epoch'),
+        b64d(capsule['ciphertext']),
+        b64d(capsule['kem_ct']),
+        b64d(capsule['signature'])
+    )
+
+
+def _row_capsule(row):
+    """Convert a database row back to the capsule dict shape used by callers."""
+    ts, unlock_date, unlock_epoch, ciphertext, kem_ct, signature = row
+    capsule = {
+        "timestamp": ts,
+        "unlock_date": unlock_date,
+        "ciphertext": b64e(ciphertext),
+        "kem_ct": b64e(kem_ct),
+        "signature": b64e(signature)
+    }
+    if unlock_epoch is not None:
+        capsule["unlock_epoch"] = unlock_epoch
+    return capsule
+
+
+def save_capsule(capsule_data, durable=False):
+    """
+    Save capsule data to the database.
+    
+    By default the write relies on WAL with synchronous=NORMAL: it survives an
+    application crash but may be lost on power failure until the next
+    checkpoint or flush_all().
     
     Args:
         capsule_data (dict): Capsule dictionary
+        durable (bool): Sync this write to disk before returning
+    """
+    _write_rows([_capsule_row(capsule_data)], durable)
+
+
+def _write_rows(rows, durable):
+    """Insert capsule rows in one transaction, optionally with synchronous=FULL."""
+    conn = _db()
+    with _DB_LOCK:
+        _LISTING_CACHE.clear()
+        if durable:
+            conn.execute("PRAGMA synchronous=FULL")
+        try:
+            with conn:
+                conn.executemany(f"INSERT OR REPLACE INTO capsules ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)", rows)
+        finally:
+            if durable:
+                conn.execute("PRAGMA synchronous=NORMAL")
+
+
+class CapsuleBatchWriter:
+    """
+    Queue capsule saves and write them in one transaction.
+    
+    Usage:
+        with CapsuleBatchWriter() as writer:
+            for capsule in batch:
+                writer.enqueue(capsule)
+    
+    The queue is flushed when it reaches max_pending and when the block exits
+    without an exception.
     """
-    os.makedirs(CAPSULES_DIR, exist_ok=True)
-    timestamp = capsule_data['timestamp']
-    filename = f"capsule_{timestamp}.json"
-    filepath = os.path.join(CAPSULES_DIR, filename)
     
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(capsule_data, f, indent=2, ensure_ascii=False)
-        f.flush()  # Ensure data is written to disk
-        os.fsync(f.fileno())  # Force write to disk
+    def __init__(self, max_pending=256, durable=False):
+        self.max_pending = max_pending
+        self.durable = durable
+        self._rows = []
+    
+    def enqueue(self, capsule_data):
+        self._rows.append(_capsule_row(capsule_data))
+        if len(self._rows) >= self.max_pending:
+            self.flush()
+    
+    def flush(self):
+        """Write all queued capsules in a single transaction (one WAL sync at most)."""
+        if not self._rows:
+            return
+        rows, self._rows = self._rows, []
+        _write_rows(rows, self.durable)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        return False
+
+
+def flush_all():
+    """
+    Checkpoint for shutdown: write the capsule WAL back into the database
+    and ask the OS to flush all dirty buffers.
+    """
+    if _DB is not None and _DB_PID == os.getpid():
+        with _DB_LOCK:
+            _DB.execute("PRAGMA wal_checkpoint(FULL)")
+    if hasattr(os, "sync"):
+        os.sync()
 
 
 def load_capsule(timestamp):
     """
-    Load capsule data from file.
+    Load capsule data from the database.
     
     Args:
         timestamp (str): Capsule timestamp
@@ -72,18 +271,43 @@ def load_capsule(timestamp):
     Returns:
         dict: Capsule data or None if not found
     """
-    filename = f"capsule_{timestamp}.json"
-    filepath = os.path.join(CAPSULES_DIR, filename)
+    conn = _db()
+    with _DB_LOCK:
+        row = conn.execute(f"SELECT {_COLUMNS} FROM capsules WHERE ts = ?", (timestamp,)).fetchone()
+    return _row_capsule(row) if row else None
+
+
+def export_capsule_pretty(timestamp):
+    """
+    Export a capsule as indented JSON for human inspection.
     
-    if not os.path.exists(filepath):
-        return None
+    Storage and API responses stay compact; this is only for explicit export.
     
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError) as e:
-        print(f"Error loading capsule {timestamp}: {e}")
+    Args:
+        timestamp (str): Capsule timestamp
+        
+    Returns:
+        str: Pretty-printed capsule JSON or None if not found
+    """
+    capsule = load_capsule(timestamp)
+    if capsule is None:
         return None
+    return json.dumps(capsule, indent=2, ensure_ascii=False)
+
+
+def _cached_listing(name, build):
+    """
+    Return build(conn), reusing the previous result until the database changes.
+    """
+    conn = _db()
+    with _DB_LOCK:
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        cached = _LISTING_CACHE.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        result = build(conn)
+        _LISTING_CACHE[name] = (version, result)
+    return result
 
 
 def list_capsules():
@@ -93,18 +317,55 @@ def list_capsules():
     Returns:
         list: List of timestamps
     """
-    if not os.path.exists(CAPSULES_DIR):
-        os.makedirs(CAPSULES_DIR, exist_ok=True)
-        return []
+    return list(_cached_listing("list", _build_list))
+
+
+def _build_list(conn):
+    return [ts for (ts,) in conn.execute("SELECT ts FROM capsules ORDER BY ts")]
+
+
+def iter_capsules():
+    """
+    Iterate over all capsules in a single query.
     
-    capsules = []
-    try:
-        for filename in os.listdir(CAPSULES_DIR):
-            if filename.startswith("capsule_") and filename.endswith(".json"):
-                timestamp = filename[8:-5]  # Remove "capsule_" and ".json"
-                capsules.append(timestamp)
-    except OSError as e:
-        print(f"Error listing capsules: {e}")
-        return []
-    
-    return sorted(capsules)
\ No newline at end of file
+    Returns:
+        iterator: (timestamp, capsule dict) pairs sorted by timestamp
+    """
+    conn = _db()
+    with _DB_LOCK:
+        rows = conn.execute(f"SELECT {_COLUMNS} FROM capsules ORDER BY ts").fetchall()
+    return ((row[0], _row_capsule(row)) for row in rows)
+
+
+def load_all_capsules():
+    """
+    Load every capsule in a single query.
+    
+    Returns:
+        dict: Timestamp -> capsule dict, in timestamp order
+    """
+    return dict(iter_capsules())
+
+
+def load_capsule_index():
+    """
+    Load listing fields for every capsule without reading ciphertexts.
+    
+    The result is cached until the database changes; treat it as read-only.
+    
+    Returns:
+        dict: Timestamp -> {"unlock_date": ..., "unlock_epoch": ...}
+    """
+    return _cached_listing("index", _build_index)
+
+
+def _build_index(conn):
+    rows = conn.execute("SELECT ts, unlock_date, unlock_epoch FROM capsules ORDER BY ts").fetchall()
+    index = {}
+    for ts, unlock_date, unlock_epoch in rows:
+        entry = {"unlock_date": unlock_date}
+        if unlock_epoch is not None:
+            entry["unlock_epoch"] = unlock_epoch
+        index[ts] = entry
+    return index
+
@@ -1,11 +1,42 @@
 """
 Utils Module for Quantum-Safe Digital Time Capsule
 
-Helper functions for time-lock checks, hashing, and validation.
+Helper functions for time-lock checks, hashing, encoding, and validation.
 """
 
 import datetime
+import functools
 import hashlib
+import time
+
+try:
+    from blake3 import blake3
+except ImportError:  # Optional, only needed for hash_data(..., algorithm='blake3')
+    blake3 = None
+
+# Base64 helpers live in qtc_hot so they can be compiled with mypyc
+from qtc_hot import b64e, b64d
+
+
+# (start, end, date): today's local date and the epoch range it covers
+_TODAY = (0.0, 0.0, None)
+
+
+def _today():
+    """
+    Return datetime.date.today(), re-reading the local calendar only when the
+    clock leaves the day the cached date covers.
+    """
+    global _TODAY
+    start, end, today = _TODAY
+    now = time.time()
+    if start <= now < end:
+        return today
+    today = datetime.date.today()
+    start = datetime.datetime.combine(today, datetime.time()).timestamp()
+    end = datetime.datetime.combine(today + datetime.timedelta(days=1), datetime.time()).timestamp()
+    _TODAY = (start, end, today)
+    return today
 
 
 def is_unlocked(unlock_date_str):
@@ -19,13 +50,63 @@ def is_unlocked(unlock_date_str):
         bool: True if unlocked
     """
     try:
-        unlock_date = datetime.date.fromisoformat(unlock_date_str)
-        today = datetime.date.today()
-        return today >= unlock_date
+        return _today() >= _parse_date(unlock_date_str)
     except ValueError:
         return False
 
 
+# Capsule lists repeat the same few dates, so each string is parsed once
+_parse_date = functools.lru_cache(maxsize=2048)(datetime.date.fromisoformat)
+
+
+def is_unlocked_epoch(unlock_epoch):
+    """
+    Check if the current time is past a precomputed unlock epoch.
+    
+    Args:
+        unlock_epoch (int): Local midnight of the unlock date, in seconds since the epoch
+        
+    Returns:
+        bool: True if unlocked
+    """
+    return time.time() >= unlock_epoch
+
+
+def is_capsule_unlocked(capsule):
+    """
+    Check a capsule's lock status, preferring its precomputed unlock_epoch.
+    
+    Args:
+        capsule (dict): Capsule or listing entry with unlock_date and optional unlock_epoch
+        
+    Returns:
+        bool: True if unlocked
+    """
+    unlock_epoch = capsule.get('unlock_epoch')
+    if unlock_epoch is None:  # Capsules created before unlock_epoch was stored
+        return is_unlocked(capsule['unlock_date'])
+    return is_unlocked_epoch(unlock_epoch)
+
+
+def date_to_epoch(date_str):
+    """
+    Convert a date to the epoch seconds of its local midnight.
+    
+    Args:
+        date_str (str): Date in YYYY-MM-DD format
+        
+    Returns:
+        int: Seconds since the epoch, or None if the platform cannot represent
+        that date's local midnight (e.g. 0001-01-01); is_capsule_unlocked then
+        falls back to the date string
+    """
+    date = _parse_date(date_str)
+    try:
+        return int(datetime.datetime.combine(date, datetime.time()).timestamp())
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
 def get_current_timestamp():
     """
     Get current timestamp in ISO format.
@@ -36,19 +117,31 @@ def get_current_timestamp():
     return datetime.datetime.now().isoformat().replace(':', '-')
 
 
-def hash_data(data):
+def hash_data(data, algorithm='sha256'):
     """
-    Hash data using SHA256.
+    Hash data using SHA256, or BLAKE3 for non-signature integrity/ID hashing.
+    
+    Bytes-like input is hashed in place without an intermediate copy.
     
     Args:
-        data (str): Data to hash
+        data (str | bytes | memoryview): Data to hash
+        algorithm (str): 'sha256' or 'blake3' (optional: pip install blake3)
         
     Returns:
         str: Hex digest
     """
-    return hashlib.sha256(data.encode()).hexdigest()
+    if isinstance(data, str):
+        data = data.encode()
+    if algorithm == 'sha256':
+        return hashlib.sha256(data).hexdigest()
+    if algorithm == 'blake3':
+        if blake3 is None:
+            raise ValueError("blake3 is not installed")
+        return blake3(data).hexdigest()
+    raise ValueError(f"Unsupported hash algorithm: {algorithm}")
 
 
+@functools.lru_cache(maxsize=2048)
 def validate_date(date_str):
     """
     Validate date string format.
@@ -60,7 +153,8 @@ def validate_date(date_str):
         bool: True if valid
     """
     try:
-        datetime.date.fromisoformat(date_str)
+        _parse_date(date_str)
         return True
     except ValueError:
-        return False
\ No newline at end of file
+        return False
+
@@ -0,0 +1,14 @@
+"""
+WSGI entry point for Quantum-Safe Digital Time Capsule
+
+Serves the Flask API with a production WSGI server, e.g.:
+
+    gunicorn -w $(nproc) -k gthread --threads 4 --keep-alive 30 --preload wsgi:app
+
+The gthread worker keeps HTTP connections alive for --keep-alive seconds
+(the sync worker ignores that flag and closes after every response), and the
+cryptography bindings release the GIL, so worker threads scale across cores.
+--preload imports the app once in the master so workers share it copy-on-write.
+"""
+
+from api import app
\ No newline at end of file